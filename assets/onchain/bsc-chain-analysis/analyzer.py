@@ -1,7 +1,9 @@
 import time
 import pandas as pd
 from web3 import Web3
-from abis import FACTORY_ABI, PAIR_ABI, ERC20_ABI
+from abis import FACTORY_ABI, ERC20_ABI
+from pair_info import ZERO_ADDRESS, load_pair_info, make_web3
+from swap_logs import DEFAULT_BATCH_SIZE, SWAP_TOPIC, aggregate_swaps, chunk_ranges, decode_swap_logs, fetch_logs
 
 # 配置
 BSC_RPC = "https://binance.llamarpc.com"
@@ -10,9 +12,11 @@ WBNB_ADDRESS = "0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c"
 
 class BSCVolumeAnalyzer:
     def __init__(self, rpc_url):
-        self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+        self.rpc_url = rpc_url
+        self.w3 = make_web3(rpc_url)
         if not self.w3.is_connected():
             raise Exception("无法连接到 BSC 节点")
+        self.chain_id = self.w3.eth.chain_id
         self.factory = self.w3.eth.contract(address=FACTORY_ADDRESS, abi=FACTORY_ABI)
 
     def get_pair_address(self, token_address):
@@ -25,70 +29,40 @@ class BSCVolumeAnalyzer:
         decimals = contract.functions.decimals().call()
         return symbol, decimals
 
-    def analyze_volume(self, token_address, blocks_back=1000):
-        pair_address = self.get_pair_address(token_address)
-        if pair_address == "0x0000000000000000000000000000000000000000":
+    def analyze_volume(self, token_address, blocks_back=1000, batch_size=DEFAULT_BATCH_SIZE):
+        token_checksum = Web3.to_checksum_address(token_address)
+        # getPair/symbol/decimals 与 token0/token1/getReserves 各合并为一次 Multicall3 调用
+        info = load_pair_info(self.w3, self.chain_id, FACTORY_ADDRESS, token_checksum, WBNB_ADDRESS)
+        pair_address = info["pairAddress"]
+        if pair_address == ZERO_ADDRESS:
             print("未找到该代币与 WBNB 的交易对")
             return
 
-        pair_contract = self.w3.eth.contract(address=pair_address, abi=PAIR_ABI)
-        token0 = pair_contract.functions.token0().call()
-        token1 = pair_contract.functions.token1().call()
-        
-        symbol, decimals = self.get_token_info(token_address)
-        is_token0 = (token_address.lower() == token0.lower())
+        symbol, decimals = info["symbol"], info["decimals"]
+        is_token0 = token_checksum == info["token0"]
 
         latest_block = self.w3.eth.block_number
         start_block = latest_block - blocks_back
 
         print(f"正在分析 {symbol} 在过去 {blocks_back} 个区块内的交易 (从 {start_block} 到 {latest_block})...")
 
-        # 分批获取 Swap 事件以避免 RPC 限制
-        logs = []
+        # 分批获取 Swap 事件以避免 RPC 限制；每个 HTTP 请求批量携带 batch_size 个区间，各请求并发发送
         chunk_size = 100
-        for i in range(start_block, latest_block, chunk_size):
-            end = min(i + chunk_size - 1, latest_block)
-            try:
-                chunk_logs = pair_contract.events.Swap().get_logs(from_block=i, to_block=end)
-                logs.extend(chunk_logs)
-            except Exception as e:
-                print(f"获取区块 {i} 到 {end} 的日志失败: {e}")
-
-        buys = 0
-        sells = 0
-        buy_volume = 0.0
-        sell_volume = 0.0
-        buy_volume_bnb = 0.0
-        sell_volume_bnb = 0.0
-
-        for log in logs:
-            args = log['args']
-            if is_token0:
-                # Token 是 token0, WBNB 是 token1
-                token_amount_in = args['amount0In'] / (10**decimals)
-                token_amount_out = args['amount0Out'] / (10**decimals)
-                bnb_amount_in = args['amount1In'] / (10**18)
-                bnb_amount_out = args['amount1Out'] / (10**18)
-            else:
-                # Token 是 token1, WBNB 是 token0
-                token_amount_in = args['amount1In'] / (10**decimals)
-                token_amount_out = args['amount1Out'] / (10**decimals)
-                bnb_amount_in = args['amount0In'] / (10**18)
-                bnb_amount_out = args['amount0Out'] / (10**18)
+        ranges = chunk_ranges(start_block, latest_block, chunk_size)
+        raw_logs, rpc_errors, failed_ranges = fetch_logs(
+            self.rpc_url, pair_address, SWAP_TOPIC, ranges, batch_size=batch_size
+        )
+        last_errors = {(e["fromBlock"], e["toBlock"]): e["error"] for e in rpc_errors}
+        for lo, hi in failed_ranges:
+            print(f"获取区块 {lo} 到 {hi} 的日志失败: {last_errors.get((lo, hi))}")
+        logs = decode_swap_logs(raw_logs)
 
-            if token_amount_out > 0:
-                # 用户收到 Token -> 买入 (用户支付了 BNB)
-                buys += 1
-                buy_volume += token_amount_out
-                buy_volume_bnb += bnb_amount_in
-            elif token_amount_in > 0:
-                # 用户发送 Token -> 卖出 (用户收到了 BNB)
-                sells += 1
-                sell_volume += token_amount_in
-                sell_volume_bnb += bnb_amount_out
+        buys, sells, buy_volume, sell_volume, buy_volume_bnb, sell_volume_bnb = aggregate_swaps(
+            logs, is_token0, decimals
+        )
 
         # 获取当前价格
-        reserves = pair_contract.functions.getReserves().call()
+        reserves = info["reserves"]
         if is_token0:
             price_in_bnb = (reserves[1] / 10**18) / (reserves[0] / 10**decimals)
         else:
@@ -9,7 +9,15 @@ from typing import Any, Dict
 
 from web3 import Web3
 
-from abis import FACTORY_ABI, PAIR_ABI, ERC20_ABI
+from pair_info import load_pair_info, make_web3
+from swap_logs import (
+    DEFAULT_BATCH_SIZE,
+    SWAP_TOPIC,
+    aggregate_swaps,
+    chunk_ranges,
+    decode_swap_logs,
+    fetch_logs,
+)
 
 
 DEFAULT_BSC_RPC = os.environ.get("BSC_RPC_URL", "https://binance.llamarpc.com")
@@ -23,13 +31,6 @@ def _as_checksum(w3: Web3, address: str) -> str:
     return w3.to_checksum_address(address)
 
 
-def _safe_float(x: Any) -> float:
-    try:
-        return float(x)
-    except Exception:
-        return 0.0
-
-
 def analyze_volume(
     token_address: str,
     blocks_back: int,
@@ -37,18 +38,20 @@ def analyze_volume(
     factory_address: str,
     wbnb_address: str,
     chunk_size: int,
+    batch_size: int = DEFAULT_BATCH_SIZE,
 ) -> Dict[str, Any]:
     started = time.time()
-    w3 = Web3(Web3.HTTPProvider(rpc_url))
-    if not w3.is_connected():
-        raise Exception("无法连接到 BSC RPC 节点")
-
-    factory = w3.eth.contract(address=_as_checksum(w3, factory_address), abi=FACTORY_ABI)
+    w3 = make_web3(rpc_url)
+    try:
+        chain_id = int(w3.eth.chain_id)
+    except Exception as e:
+        raise Exception("无法连接到 BSC RPC 节点") from e
 
     token_checksum = _as_checksum(w3, token_address)
     wbnb_checksum = _as_checksum(w3, wbnb_address)
 
-    pair_address = factory.functions.getPair(token_checksum, wbnb_checksum).call()
+    info = load_pair_info(w3, chain_id, _as_checksum(w3, factory_address), token_checksum, wbnb_checksum)
+    pair_address = info["pairAddress"]
     if int(pair_address, 16) == 0:
         return {
             "ok": False,
@@ -57,78 +60,30 @@ def analyze_volume(
             "pairAddress": pair_address,
         }
 
-    pair_contract = w3.eth.contract(address=_as_checksum(w3, pair_address), abi=PAIR_ABI)
-    token0 = pair_contract.functions.token0().call()
-    token1 = pair_contract.functions.token1().call()
-
-    token_contract = w3.eth.contract(address=token_checksum, abi=ERC20_ABI)
-    symbol = token_contract.functions.symbol().call()
-    decimals = int(token_contract.functions.decimals().call())
+    token0 = info["token0"]
+    token1 = info["token1"]
+    symbol = info["symbol"]
+    decimals = info["decimals"]
 
-    is_token0 = token_checksum.lower() == token0.lower()
+    is_token0 = token_checksum == token0
 
     latest_block = int(w3.eth.block_number)
     start_block = max(0, latest_block - int(blocks_back))
 
-    logs = []
-    rpc_errors = []
-    failed_ranges = []
-    suppressed_rpc_errors = 0
-    suppressed_failed_ranges = 0
-    for i in range(start_block, latest_block + 1, int(chunk_size)):
-        end = min(i + int(chunk_size) - 1, latest_block)
-        attempt = 0
-        backoff = 0.6
-        while True:
-            try:
-                chunk_logs = pair_contract.events.Swap().get_logs(from_block=i, to_block=end)
-                logs.extend(chunk_logs)
-                break
-            except Exception as e:
-                attempt += 1
-                if len(rpc_errors) < MAX_RPC_ERRORS:
-                    rpc_errors.append({"fromBlock": i, "toBlock": end, "attempt": attempt, "error": str(e)})
-                else:
-                    suppressed_rpc_errors += 1
-                if attempt >= 4:
-                    if len(failed_ranges) < MAX_FAILED_RANGES:
-                        failed_ranges.append({"fromBlock": i, "toBlock": end})
-                    else:
-                        suppressed_failed_ranges += 1
-                    break
-                time.sleep(backoff)
-                backoff = min(8.0, backoff * 2.0)
-
-    buys = 0
-    sells = 0
-    buy_volume = 0.0
-    sell_volume = 0.0
-    buy_volume_bnb = 0.0
-    sell_volume_bnb = 0.0
-
-    for log in logs:
-        args = log["args"]
-        if is_token0:
-            token_amount_in = _safe_float(args["amount0In"]) / (10**decimals)
-            token_amount_out = _safe_float(args["amount0Out"]) / (10**decimals)
-            bnb_amount_in = _safe_float(args["amount1In"]) / (10**18)
-            bnb_amount_out = _safe_float(args["amount1Out"]) / (10**18)
-        else:
-            token_amount_in = _safe_float(args["amount1In"]) / (10**decimals)
-            token_amount_out = _safe_float(args["amount1Out"]) / (10**decimals)
-            bnb_amount_in = _safe_float(args["amount0In"]) / (10**18)
-            bnb_amount_out = _safe_float(args["amount0Out"]) / (10**18)
-
-        if token_amount_out > 0:
-            buys += 1
-            buy_volume += token_amount_out
-            buy_volume_bnb += bnb_amount_in
-        elif token_amount_in > 0:
-            sells += 1
-            sell_volume += token_amount_in
-            sell_volume_bnb += bnb_amount_out
-
-    reserves = pair_contract.functions.getReserves().call()
+    ranges = chunk_ranges(start_block, latest_block, int(chunk_size))
+    raw_logs, all_rpc_errors, all_failed_ranges = fetch_logs(
+        rpc_url, pair_address, SWAP_TOPIC, ranges, batch_size=batch_size
+    )
+    logs = decode_swap_logs(raw_logs)
+
+    rpc_errors = all_rpc_errors[:MAX_RPC_ERRORS]
+    suppressed_rpc_errors = len(all_rpc_errors) - len(rpc_errors)
+    failed_ranges = [{"fromBlock": lo, "toBlock": hi} for lo, hi in all_failed_ranges[:MAX_FAILED_RANGES]]
+    suppressed_failed_ranges = len(all_failed_ranges) - len(failed_ranges)
+
+    buys, sells, buy_volume, sell_volume, buy_volume_bnb, sell_volume_bnb = aggregate_swaps(logs, is_token0, decimals)
+
+    reserves = info["reserves"]
     if is_token0:
         price_in_bnb = (reserves[1] / 10**18) / (reserves[0] / 10**decimals)
     else:
@@ -179,6 +134,13 @@ def main() -> None:
     parser.add_argument("--factory", default=DEFAULT_FACTORY_ADDRESS, help="PancakeSwap V2 factory address")
     parser.add_argument("--wbnb", default=DEFAULT_WBNB_ADDRESS, help="WBNB address")
     parser.add_argument("--chunk-size", type=int, default=100, help="Log query chunk size (blocks)")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Log chunks per JSON-RPC batch request (1 sends plain requests; "
+        "nodes that reject batches fall back to one request per chunk)",
+    )
 
     args = parser.parse_args()
     result = analyze_volume(
@@ -188,6 +150,7 @@ def main() -> None:
         factory_address=args.factory,
         wbnb_address=args.wbnb,
         chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
     )
     print(json.dumps(result, ensure_ascii=False, indent=2))
 
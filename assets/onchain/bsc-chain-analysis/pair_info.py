@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+交易对元数据获取（供 analyzer.py / mcp_volume_analyze.py 共用）。
+
+通过 Multicall3.aggregate3 将 getPair / symbol / decimals 以及
+token0 / token1 / getReserves 合并为两次 eth_call。
+
+不变的元数据会缓存在进程内，并在安装了 diskcache 时持久化到
+~/.cache/bsc-analyzer/（可用 BSC_ANALYZER_CACHE_DIR 覆盖），
+重复分析同一代币时只需一次 getReserves 调用。
+"""
+
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from eth_abi import decode as abi_decode
+from eth_abi import encode as abi_encode
+from requests import Session
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+
+try:
+    import diskcache
+except ImportError:  # diskcache 为可选依赖，缺失时只使用进程内缓存
+    diskcache = None
+
+
+# Multicall3 在 BSC 等链上的统一部署地址
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+# factory 不会变更交易对地址，但仍为 pairAddress 设置有限的过期时间
+PAIR_ADDRESS_TTL_SEC = 3600
+HTTP_POOL_SIZE = 16
+
+# 按 (chain_id, factory, token, wbnb) 缓存不会变化的元数据，供同一进程内重复分析使用
+_PAIR_INFO_CACHE: Dict[Tuple[int, str, str, str], Dict[str, Any]] = {}
+_DISK_CACHE: Any = None
+
+
+def _cache_dir() -> Path:
+    env = os.getenv("BSC_ANALYZER_CACHE_DIR")
+    if env:
+        return Path(env).expanduser()
+    return Path.home() / ".cache" / "bsc-analyzer"
+
+
+def _disk_cache() -> Optional[Any]:
+    global _DISK_CACHE
+    if _DISK_CACHE is None and diskcache is not None:
+        try:
+            _DISK_CACHE = diskcache.Cache(str(_cache_dir()))
+        except Exception:
+            _DISK_CACHE = False
+    # Cache 定义了 __len__，空缓存为假值，因此不能用 `or`
+    return _DISK_CACHE if _DISK_CACHE is not False else None
+
+
+def _load_cached(key: Tuple[int, str, str, str]) -> Optional[Dict[str, Any]]:
+    info = _PAIR_INFO_CACHE.get(key)
+    if info is not None:
+        return info
+
+    cache = _disk_cache()
+    if cache is None:
+        return None
+    try:
+        pair_address = cache.get(("pair",) + key)
+        meta = cache.get(("meta", key[0], pair_address, key[2])) if pair_address else None
+    except Exception:
+        return None
+    if meta is None:
+        return None
+    info = {"pairAddress": pair_address, **meta}
+    _PAIR_INFO_CACHE[key] = info
+    return info
+
+
+def _store_cached(key: Tuple[int, str, str, str], info: Dict[str, Any]):
+    _PAIR_INFO_CACHE[key] = info
+
+    cache = _disk_cache()
+    if cache is None:
+        return
+    meta = {k: info[k] for k in ("token0", "token1", "symbol", "decimals")}
+    try:
+        cache.set(("pair",) + key, info["pairAddress"], expire=PAIR_ADDRESS_TTL_SEC)
+        cache.set(("meta", key[0], info["pairAddress"], key[2]), meta)
+    except Exception:
+        pass
+
+
+def make_web3(rpc_url: str) -> Web3:
+    """创建绑定连接池会话的 Web3 实例，同步 eth_call 复用 keep-alive 连接，避免重复 TLS 握手。"""
+    session = Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return Web3(Web3.HTTPProvider(rpc_url, session=session))
+
+
+def _calldata(signature: str, arg_types: Sequence[str] = (), args: Sequence[Any] = ()) -> bytes:
+    selector = Web3.keccak(text=signature)[:4]
+    return bytes(selector) + (abi_encode(list(arg_types), list(args)) if arg_types else b"")
+
+
+def aggregate3(w3: Web3, calls: List[Tuple[str, bytes]], allow_failure: bool = False) -> List[Optional[bytes]]:
+    """
+    一次 eth_call 执行多个只读调用，返回各调用的 returnData。
+
+    allow_failure=False 时任一调用失败则整体 revert；为 True 时失败的调用返回 None。
+    """
+    data = _calldata(
+        "aggregate3((address,bool,bytes)[])",
+        ["(address,bool,bytes)[]"],
+        [[(target, allow_failure, calldata) for target, calldata in calls]],
+    )
+    raw = w3.eth.call({"to": MULTICALL3_ADDRESS, "data": Web3.to_hex(data)})
+    (results,) = abi_decode(["(bool,bytes)[]"], bytes(raw))
+    return [return_data if success else None for success, return_data in results]
+
+
+def _get_reserves(w3: Web3, pair_address: str) -> Tuple[int, int]:
+    raw = w3.eth.call({"to": pair_address, "data": Web3.to_hex(_calldata("getReserves()"))})
+    reserve0, reserve1, _ts = abi_decode(["uint112", "uint112", "uint32"], bytes(raw))
+    return reserve0, reserve1
+
+
+def load_pair_info(
+    w3: Web3,
+    chain_id: int,
+    factory_address: str,
+    token_address: str,
+    wbnb_address: str,
+) -> Dict[str, Any]:
+    """
+    返回 {pairAddress, token0, token1, symbol, decimals, reserves}。
+
+    未找到交易对时只返回 {pairAddress: ZERO_ADDRESS}。
+    """
+    key = (int(chain_id), factory_address, token_address, wbnb_address)
+    cached = _load_cached(key)
+    if cached is not None:
+        return {**cached, "reserves": _get_reserves(w3, cached["pairAddress"])}
+
+    # symbol/decimals 允许失败：非 ERC20 合约或错误地址不应让 getPair 一起 revert，
+    # 先确认交易对存在，再解码代币元数据
+    pair_ret, symbol_ret, decimals_ret = aggregate3(
+        w3,
+        [
+            (factory_address, _calldata("getPair(address,address)", ["address", "address"], [token_address, wbnb_address])),
+            (token_address, _calldata("symbol()")),
+            (token_address, _calldata("decimals()")),
+        ],
+        allow_failure=True,
+    )
+    if pair_ret is None:
+        raise RuntimeError(f"factory {factory_address} getPair 调用失败")
+    (pair_address,) = abi_decode(["address"], pair_ret)
+    pair_address = Web3.to_checksum_address(pair_address)
+    if int(pair_address, 16) == 0:
+        return {"pairAddress": ZERO_ADDRESS}
+    if symbol_ret is None or decimals_ret is None:
+        raise RuntimeError(f"代币 {token_address} 的 symbol()/decimals() 调用失败")
+
+    token0_ret, token1_ret, reserves_ret = aggregate3(
+        w3,
+        [
+            (pair_address, _calldata("token0()")),
+            (pair_address, _calldata("token1()")),
+            (pair_address, _calldata("getReserves()")),
+        ],
+    )
+    info = {
+        "pairAddress": pair_address,
+        "token0": Web3.to_checksum_address(abi_decode(["address"], token0_ret)[0]),
+        "token1": Web3.to_checksum_address(abi_decode(["address"], token1_ret)[0]),
+        "symbol": abi_decode(["string"], symbol_ret)[0],
+        "decimals": int(abi_decode(["uint8"], decimals_ret)[0]),
+    }
+    _store_cached(key, info)
+
+    reserve0, reserve1, _ts = abi_decode(["uint112", "uint112", "uint32"], reserves_ret)
+    return {**info, "reserves": (reserve0, reserve1)}
@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+Swap 日志获取工具（供 analyzer.py / mcp_volume_analyze.py 共用）。
+
+将多个区块区间的 eth_getLogs 请求合并为 JSON-RPC 批量请求，
+并通过共享的 aiohttp 会话并发发送。
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+from eth_abi import decode as abi_decode
+from web3 import Web3
+
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖，缺失时退回纯 Python 聚合
+    np = None
+
+
+SWAP_EVENT_SIGNATURE = "Swap(address,uint256,uint256,uint256,uint256,address)"
+SWAP_TOPIC = Web3.to_hex(Web3.keccak(text=SWAP_EVENT_SIGNATURE))
+# Swap 事件 data 中的非 indexed 字段：amount0In, amount1In, amount0Out, amount1Out
+SWAP_DATA_TYPES = ["uint256", "uint256", "uint256", "uint256"]
+DEFAULT_BATCH_SIZE = 10
+MAX_ATTEMPTS = 4
+MAX_CONNECTIONS = 16
+# 节点对单个请求返回结果过多或查询超时的 JSON-RPC 错误时，将区间对半拆分，两半作为新请求重新排队
+SPLIT_ERROR_MARKERS = ("query returned more than", "limit exceeded", "response size", "timeout", "timed out")
+
+# 字段顺序与 decode_swap_logs 返回的元组一致
+SWAP_DTYPE = None if np is None else np.dtype([("a0i", "f8"), ("a1i", "f8"), ("a0o", "f8"), ("a1o", "f8")])
+# 超过该条数才使用 numba 内核：单次 CLI 调用中导入 numba 并加载缓存内核约需 0.4s，
+# 而 numpy 掩码聚合几百条日志只需亚毫秒
+NUMBA_MIN_SWAPS = 1_000_000
+
+SwapAmounts = Tuple[int, int, int, int]
+SwapTotals = Tuple[int, int, float, float, float, float]
+FetchResult = Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Tuple[int, int]]]
+
+
+def chunk_ranges(start_block: int, end_block: int, chunk_size: int) -> List[Tuple[int, int]]:
+    return [(i, min(i + chunk_size - 1, end_block)) for i in range(start_block, end_block + 1, chunk_size)]
+
+
+class RPCError(RuntimeError):
+    """节点对单个 eth_getLogs 请求返回的 JSON-RPC 错误（区别于整个 HTTP 请求失败）。"""
+
+
+def _should_split(error: Exception, lo: int, hi: int) -> bool:
+    # 只有节点针对该区间返回的错误才与区间大小有关；连接错误、读超时、HTTP 504 等按普通失败重试，
+    # 否则慢节点每轮都会收到翻倍的请求
+    if hi <= lo or not isinstance(error, RPCError):
+        return False
+    message = str(error).lower()
+    return any(marker in message for marker in SPLIT_ERROR_MARKERS)
+
+
+def _batch_payload(address: str, topic0: str, ranges: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "jsonrpc": "2.0",
+            "id": k,
+            "method": "eth_getLogs",
+            "params": [{"address": address, "topics": [topic0], "fromBlock": hex(lo), "toBlock": hex(hi)}],
+        }
+        for k, (lo, hi) in enumerate(ranges)
+    ]
+
+
+def _reply_result(reply: Any) -> Any:
+    if not isinstance(reply, dict):
+        return RPCError(f"无效的 RPC 响应: {reply}")
+    if reply.get("error") is not None:
+        return RPCError(str(reply["error"]))
+    return reply.get("result") or []
+
+
+def _match_replies(replies: List[Any], count: int) -> List[Any]:
+    results: List[Any] = [RPCError("批量响应中缺少该请求")] * count
+    for reply in replies:
+        k = reply.get("id") if isinstance(reply, dict) else None
+        if isinstance(k, int) and 0 <= k < count:
+            results[k] = _reply_result(reply)
+    return results
+
+
+async def _post(session: aiohttp.ClientSession, rpc_url: str, payload: Any) -> Any:
+    async with session.post(rpc_url, json=payload) as resp:
+        resp.raise_for_status()
+        return await resp.json(content_type=None)
+
+
+async def _fetch_logs_async(
+    session: aiohttp.ClientSession,
+    rpc_url: str,
+    address: str,
+    topic0: str,
+    ranges: List[Tuple[int, int]],
+    mode: Dict[str, bool],
+) -> List[Any]:
+    """
+    一次 POST 获取多个区间的日志；返回与 ranges 对应的日志列表或异常。
+
+    mode["batch"] 为 False（batch_size=1，或节点不支持批量请求）时，每个区间单独发送普通请求对象。
+    """
+    payload = _batch_payload(address, topic0, ranges)
+    if mode["batch"] and len(payload) > 1:
+        replies = await _post(session, rpc_url, payload)
+        if isinstance(replies, list):
+            return _match_replies(replies, len(ranges))
+        # 不支持批量请求的节点会返回单个错误对象：本次及之后的请求都改为逐个区间发送
+        mode["batch"] = False
+
+    replies = await asyncio.gather(*(_post(session, rpc_url, item) for item in payload), return_exceptions=True)
+    return [reply if isinstance(reply, Exception) else _reply_result(reply) for reply in replies]
+
+
+async def _fetch_batch(
+    session: aiohttp.ClientSession,
+    rpc_url: str,
+    address: str,
+    topic0: str,
+    ranges: List[Tuple[int, int]],
+    mode: Dict[str, bool],
+) -> FetchResult:
+    logs: List[Dict[str, Any]] = []
+    rpc_errors: List[Dict[str, Any]] = []
+    failed_ranges: List[Tuple[int, int]] = []
+
+    pending = [(lo, hi, 0) for lo, hi in ranges]
+    backoff = 0.6
+    while pending:
+        try:
+            results = await _fetch_logs_async(
+                session, rpc_url, address, topic0, [(lo, hi) for lo, hi, _ in pending], mode
+            )
+        except Exception as e:
+            results = [e] * len(pending)
+
+        retry = []
+        backoff_needed = False
+        for (lo, hi, attempt), result in zip(pending, results):
+            if not isinstance(result, Exception):
+                logs.extend(result)
+                continue
+            if _should_split(result, lo, hi):
+                mid = (lo + hi) // 2
+                retry.extend([(lo, mid, 0), (mid + 1, hi, 0)])
+                continue
+            attempt += 1
+            rpc_errors.append({"fromBlock": lo, "toBlock": hi, "attempt": attempt, "error": str(result) or repr(result)})
+            if attempt >= MAX_ATTEMPTS:
+                failed_ranges.append((lo, hi))
+            else:
+                retry.append((lo, hi, attempt))
+                backoff_needed = True
+
+        if backoff_needed:
+            await asyncio.sleep(backoff)
+            backoff = min(8.0, backoff * 2.0)
+        pending = retry
+
+    return logs, rpc_errors, failed_ranges
+
+
+async def _gather_all(
+    rpc_url: str,
+    address: str,
+    topic0: str,
+    ranges: List[Tuple[int, int]],
+    batch_size: int,
+) -> FetchResult:
+    batches = [ranges[b : b + batch_size] for b in range(0, len(ranges), batch_size)]
+    # 各批次共享：任一批次发现节点不支持批量请求后，其余批次也改为逐个发送
+    mode = {"batch": batch_size > 1}
+    connector = aiohttp.TCPConnector(limit_per_host=MAX_CONNECTIONS)
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=30)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        results = await asyncio.gather(*(_fetch_batch(session, rpc_url, address, topic0, batch, mode) for batch in batches))
+
+    logs: List[Dict[str, Any]] = []
+    rpc_errors: List[Dict[str, Any]] = []
+    failed_ranges: List[Tuple[int, int]] = []
+    for batch_logs, batch_errors, batch_failed in results:
+        logs.extend(batch_logs)
+        rpc_errors.extend(batch_errors)
+        failed_ranges.extend(batch_failed)
+    return logs, rpc_errors, failed_ranges
+
+
+def fetch_logs(
+    rpc_url: str,
+    address: str,
+    topic0: str,
+    ranges: List[Tuple[int, int]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> FetchResult:
+    """
+    并发获取日志：每 batch_size 个区间合并为一个批量请求，各批量请求并发发送
+    （batch_size=1 或节点不支持批量请求时，每个区间单独发送普通请求），
+    失败的区间按指数退避重试；节点对单个区间返回结果过多或查询超时错误时，该区间对半拆分后重新请求。
+
+    返回 (logs, rpc_errors, failed_ranges)。
+    """
+    return asyncio.run(_gather_all(rpc_url, address, topic0, ranges, max(1, int(batch_size))))
+
+
+def decode_swap_logs(raw_logs: List[Dict[str, Any]]) -> List[SwapAmounts]:
+    """直接用 eth_abi 解码 data，返回 (amount0In, amount1In, amount0Out, amount1Out)。"""
+    return [abi_decode(SWAP_DATA_TYPES, bytes.fromhex(log["data"][2:])) for log in raw_logs]
+
+
+def _aggregate_loop(token_in, token_out, bnb_in, bnb_out):
+    # 单次遍历完成买/卖计数与求和，不产生中间掩码数组
+    buys = 0
+    sells = 0
+    buy_volume = 0.0
+    sell_volume = 0.0
+    buy_volume_bnb = 0.0
+    sell_volume_bnb = 0.0
+    for k in range(token_in.shape[0]):
+        if token_out[k] > 0:
+            buys += 1
+            buy_volume += token_out[k]
+            buy_volume_bnb += bnb_in[k]
+        elif token_in[k] > 0:
+            sells += 1
+            sell_volume += token_in[k]
+            sell_volume_bnb += bnb_out[k]
+    return buys, sells, buy_volume, sell_volume, buy_volume_bnb, sell_volume_bnb
+
+
+_AGGREGATE_KERNEL: Any = None
+
+
+def _aggregate_kernel() -> Optional[Any]:
+    """按需导入 numba 并包装 _aggregate_loop；numba 不可用时返回 None。"""
+    global _AGGREGATE_KERNEL
+    if _AGGREGATE_KERNEL is None:
+        try:
+            from numba import njit
+        except ImportError:  # numba 为可选依赖，缺失时使用 numpy 掩码聚合
+            _AGGREGATE_KERNEL = False
+        else:
+            _AGGREGATE_KERNEL = njit(cache=True)(_aggregate_loop)
+    return _AGGREGATE_KERNEL or None
+
+
+def aggregate_swaps(swaps: List[SwapAmounts], is_token0: bool, decimals: int) -> SwapTotals:
+    """
+    按买/卖方向汇总 Swap 日志。
+
+    返回 (buys, sells, buy_volume, sell_volume, buy_volume_bnb, sell_volume_bnb)。
+    """
+    inv_tok = 10.0 ** (-decimals)
+    inv_bnb = 1e-18
+    if np is None:
+        return _aggregate_swaps_py(swaps, is_token0, inv_tok, inv_bnb)
+
+    # AoS -> SoA：一次 C 循环填充结构化数组；uint256 数额可能超出 int64 范围，统一按 float64 暂存
+    arr = np.fromiter(swaps, dtype=SWAP_DTYPE, count=len(swaps))
+    a0i, a1i, a0o, a1o = arr["a0i"], arr["a1i"], arr["a0o"], arr["a1o"]
+
+    if is_token0:
+        # Token 是 token0, WBNB 是 token1
+        token_in, token_out, bnb_in, bnb_out = a0i, a0o, a1i, a1o
+    else:
+        # Token 是 token1, WBNB 是 token0
+        token_in, token_out, bnb_in, bnb_out = a1i, a1o, a0i, a0o
+
+    kernel = _aggregate_kernel() if len(swaps) > NUMBA_MIN_SWAPS else None
+    if kernel is not None:
+        # 首次调用需 JIT 编译，cache=True 时编译结果缓存到 __pycache__
+        buys, sells, buy_volume, sell_volume, buy_volume_bnb, sell_volume_bnb = kernel(
+            np.ascontiguousarray(token_in),
+            np.ascontiguousarray(token_out),
+            np.ascontiguousarray(bnb_in),
+            np.ascontiguousarray(bnb_out),
+        )
+        return (
+            int(buys),
+            int(sells),
+            buy_volume * inv_tok,
+            sell_volume * inv_tok,
+            buy_volume_bnb * inv_bnb,
+            sell_volume_bnb * inv_bnb,
+        )
+
+    # 用户收到 Token -> 买入；用户发送 Token -> 卖出
+    buy_mask = token_out > 0
+    sell_mask = ~buy_mask & (token_in > 0)
+
+    return (
+        int(buy_mask.sum()),
+        int(sell_mask.sum()),
+        float(token_out[buy_mask].sum()) * inv_tok,
+        float(token_in[sell_mask].sum()) * inv_tok,
+        float(bnb_in[buy_mask].sum()) * inv_bnb,
+        float(bnb_out[sell_mask].sum()) * inv_bnb,
+    )
+
+
+def _aggregate_swaps_py(swaps: List[SwapAmounts], is_token0: bool, inv_tok: float, inv_bnb: float) -> SwapTotals:
+    buys = 0
+    sells = 0
+    buy_volume = 0
+    sell_volume = 0
+    buy_volume_bnb = 0
+    sell_volume_bnb = 0
+
+    # 元组顺序为 (amount0In, amount1In, amount0Out, amount1Out)；方向在循环外确定
+    if is_token0:
+        tin, bin_, tout, bout = 0, 1, 2, 3
+    else:
+        tin, bin_, tout, bout = 1, 0, 3, 2
+
+    for swap in swaps:
+        token_amount_in = swap[tin]
+        token_amount_out = swap[tout]
+
+        if token_amount_out > 0:
+            buys += 1
+            buy_volume += token_amount_out
+            buy_volume_bnb += swap[bin_]
+        elif token_amount_in > 0:
+            sells += 1
+            sell_volume += token_amount_in
+            sell_volume_bnb += swap[bout]
+
+    # 原始整数累加，最后统一换算单位
+    return (
+        buys,
+        sells,
+        buy_volume * inv_tok,
+        sell_volume * inv_tok,
+        buy_volume_bnb * inv_bnb,
+        sell_volume_bnb * inv_bnb,
+    )
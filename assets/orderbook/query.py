@@ -3,7 +3,8 @@
 OrderBook (Wall Map + OFI) helper CLI.
 
 This is NOT an MCP server. It reads collector outputs from a local data directory:
-- latest.json (real-time snapshot written by run_daemon.py)
+- latest/<SYMBOL>.json or .msgpack (per-symbol real-time snapshot written by run_daemon.py)
+- latest.json (index written by run_daemon.py; older versions wrote all symbols here)
 - orderbook.db (optional history written by run_daemon.py)
 
 It prints a single JSON object to stdout.
@@ -15,10 +16,33 @@ import argparse
 import json
 import os
 import sys
-from datetime import datetime
+from functools import lru_cache
+from importlib.util import find_spec
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+# Parse files at least this large with src.json_codec (orjson when installed). Per-symbol snapshots
+# and the index are small, and importing orjson costs more than it saves on them in a one-shot CLI.
+ORJSON_MIN_BYTES = 256 * 1024
+
+
+def _msgpack():
+    # Imported on first use: only .msgpack snapshots need it.
+    try:
+        import msgpack
+    except ImportError:  # optional; only needed to read .msgpack snapshots
+        return None
+    return msgpack
+
+
+def _ijson():
+    # Imported on first use: only the monolithic latest.json fallback needs it.
+    try:
+        import ijson
+    except ImportError:  # optional; streams one symbol out of a monolithic latest.json
+        return None
+    return ijson
+
 
 def _default_data_dir() -> Path:
     env = os.getenv("ORDERBOOK_DATA_DIR")
@@ -34,14 +58,77 @@ def _data_paths(data_dir: Path) -> tuple[Path, Path]:
     return latest, db
 
 
+@lru_cache(maxsize=4)
+def _load_latest_cached(path_str: str, mtime_ns: int) -> Dict[str, Any]:
+    # mtime_ns is part of the cache key only: a rewrite by the daemon invalidates the entry.
+    raw = Path(path_str).read_bytes()
+    if path_str.endswith(".msgpack"):
+        return _msgpack().unpackb(raw, raw=False)
+    if len(raw) >= ORJSON_MIN_BYTES:
+        # Imported on first use: only a large monolithic latest.json benefits from it.
+        from src.json_codec import loads
+
+        return loads(raw)
+    return json.loads(raw)
+
+
 def _load_latest(latest_file: Path) -> Dict[str, Any]:
-    if not latest_file.exists():
+    try:
+        st = latest_file.stat()
+    except FileNotFoundError:
+        return {}
+    return _load_latest_cached(str(latest_file), st.st_mtime_ns)
+
+
+def _stream_latest_symbol(ijson: Any, latest_file: Path, symbol: str) -> Dict[str, Any]:
+    # Only materialize data.<SYMBOL>; other symbols in a large latest.json are skipped by the parser.
+    try:
+        with latest_file.open("rb") as f:
+            for value in ijson.items(f, f"data.{symbol.upper()}", use_float=True):
+                return value if isinstance(value, dict) else {}
+    except Exception:
         return {}
-    with latest_file.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    return {}
+
+
+def _symbol_file(latest_file: Path, symbol: str) -> Path:
+    # Detect the snapshot format by extension; if both exist (format switched), prefer the newer one.
+    newest: Optional[tuple[int, Path]] = None
+    for ext in (".msgpack", ".json"):
+        path = latest_file.parent / "latest" / f"{symbol.upper()}{ext}"
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            continue
+        if ext == ".msgpack" and find_spec("msgpack") is None:
+            continue
+        if newest is None or mtime_ns > newest[0]:
+            newest = (mtime_ns, path)
+    return newest[1] if newest else latest_file.parent / "latest" / f"{symbol.upper()}.json"
+
+
+def _is_tracked(latest_file: Path, symbol: str) -> bool:
+    # latest/<SYMBOL>.* files outlive a restart with a different symbol list; only trust the
+    # ones the current index still lists.
+    index = _load_latest(latest_file)
+    symbols = index.get("symbols") if isinstance(index, dict) else None
+    return isinstance(symbols, list) and symbol.upper() in symbols
 
 
 def _load_latest_symbol(latest_file: Path, symbol: str) -> Dict[str, Any]:
+    sym_file = _symbol_file(latest_file, symbol)
+    if sym_file.exists() and _is_tracked(latest_file, symbol):
+        sym = _load_latest(sym_file)
+        if sym:
+            return sym
+
+    # Fallback: monolithic latest.json written by older collectors.
+    ijson = _ijson() if latest_file.exists() else None
+    if ijson is not None:
+        sym = _stream_latest_symbol(ijson, latest_file, symbol)
+        if sym:
+            return sym
+
     content = _load_latest(latest_file)
     data = content.get("data", {}) if isinstance(content, dict) else {}
     return data.get(symbol.upper(), {}) if isinstance(data, dict) else {}
@@ -56,10 +143,15 @@ def _status(latest_file: Path) -> Dict[str, Any]:
 
     content = _load_latest(latest_file)
     last_update = content.get("timestamp", "")
-    data = content.get("data", {})
+    symbols = content.get("symbols")
+    if not isinstance(symbols, list):
+        data = content.get("data", {})
+        symbols = list(data.keys()) if isinstance(data, dict) else []
 
     age_seconds: Optional[float] = None
     if last_update:
+        from datetime import datetime
+
         try:
             last_dt = datetime.fromisoformat(last_update)
             age_seconds = (datetime.now() - last_dt).total_seconds()
@@ -71,7 +163,7 @@ def _status(latest_file: Path) -> Dict[str, Any]:
             "status": "STALE",
             "last_update": last_update,
             "age_seconds": round(age_seconds, 1),
-            "symbols": list(data.keys()) if isinstance(data, dict) else [],
+            "symbols": symbols,
             "message": f"latest.json is stale ({age_seconds:.0f}s old). Collector may be stopped.",
         }
 
@@ -79,7 +171,7 @@ def _status(latest_file: Path) -> Dict[str, Any]:
         "status": "ONLINE",
         "last_update": last_update,
         "age_seconds": round(age_seconds, 1) if age_seconds is not None else None,
-        "symbols": list(data.keys()) if isinstance(data, dict) else [],
+        "symbols": symbols,
     }
 
 
@@ -134,6 +226,8 @@ def _get_real_walls(latest_file: Path, symbol: str, side: str) -> Dict[str, Any]
     wall_4h = sym.get("wall_map_4h", {}) or {}
     wall_1h = sym.get("wall_map_1h", {}) or {}
 
+    from datetime import datetime
+
     result: Dict[str, Any] = {"symbol": symbol.upper(), "timestamp": datetime.now().isoformat()}
 
     if side in ("bid", "both"):
@@ -149,6 +243,19 @@ def _get_real_walls(latest_file: Path, symbol: str, side: str) -> Dict[str, Any]
     return result
 
 
+NEAR_WALL_PCT = 0.005
+
+
+def _first_wall_within(walls: list, price: float, band: float) -> Optional[Dict[str, Any]]:
+    # wall_map lists hold at most 5 walls (see WallTracker.get_wall_map), so a plain scan
+    # with the band precomputed beats paying a numpy import on every CLI call.
+    for wall in walls:
+        wprice = float(wall.get("price") or 0)
+        if wprice and abs(price - wprice) < band:
+            return wall
+    return None
+
+
 def _check_signal(latest_file: Path, symbol: str) -> Dict[str, Any]:
     sym = _load_latest_symbol(latest_file, symbol)
     if not sym:
@@ -166,16 +273,9 @@ def _check_signal(latest_file: Path, symbol: str) -> Dict[str, Any]:
     near_resistance = None
 
     if price:
-        for wall in wall_map.get("bid_walls", []) or []:
-            wprice = float(wall.get("price") or 0)
-            if wprice and abs(price - wprice) / price < 0.005:
-                near_support = wall
-                break
-        for wall in wall_map.get("ask_walls", []) or []:
-            wprice = float(wall.get("price") or 0)
-            if wprice and abs(price - wprice) / price < 0.005:
-                near_resistance = wall
-                break
+        band = price * NEAR_WALL_PCT
+        near_support = _first_wall_within(wall_map.get("bid_walls", []) or [], price, band)
+        near_resistance = _first_wall_within(wall_map.get("ask_walls", []) or [], price, band)
 
     signal = "NONE"
     confidence = "LOW"
@@ -247,12 +347,21 @@ def _get_history(db_path: Path, symbol: str, hours: int) -> Dict[str, Any]:
 
 def _healthcheck() -> Dict[str, Any]:
     result: Dict[str, Any] = {"python": sys.version}
+    # aiohttp is really imported so a broken install (e.g. a bad C extension) is reported.
     try:
         import aiohttp  # noqa: F401
 
         result["aiohttp"] = "ok"
     except Exception as e:
         result["aiohttp"] = f"missing ({e})"
+    # The remaining packages are only located, not imported, to keep the check fast.
+    for name in ("numpy", "sortedcontainers"):
+        result[name] = "ok" if find_spec(name) is not None else "missing (required by the collector)"
+    result["orjson"] = "ok" if find_spec("orjson") is not None else "missing (optional, falls back to json)"
+    result["msgpack"] = "ok" if find_spec("msgpack") is not None else "missing (optional, needed for msgpack snapshots)"
+    result["ijson"] = "ok" if find_spec("ijson") is not None else "missing (optional, streams one symbol from a monolithic latest.json)"
+    result["numba"] = "ok" if find_spec("numba") is not None else "missing (optional, OFI statistics run as plain Python)"
+    result["uvloop"] = "ok" if find_spec("uvloop") is not None else "missing (optional, default asyncio event loop is used)"
     return result
 
 
@@ -286,12 +395,15 @@ def main() -> int:
     p_hist.add_argument("--hours", type=int, default=24)
 
     args = parser.parse_args()
+    if args.cmd == "healthcheck":
+        # No data dir needed; skip resolving/creating it.
+        sys.stdout.write(json.dumps(_healthcheck(), ensure_ascii=False))
+        return 0
+
     data_dir = Path(args.data_dir).expanduser()
     latest_file, db_path = _data_paths(data_dir)
 
-    if args.cmd == "healthcheck":
-        out = _healthcheck()
-    elif args.cmd == "status":
+    if args.cmd == "status":
         out = _status(latest_file)
     elif args.cmd == "wall-map":
         out = _get_wall_map(latest_file, args.symbol, args.timeframe)
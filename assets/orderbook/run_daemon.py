@@ -4,7 +4,8 @@ OrderBook collector daemon.
 
 Continuously collects Binance futures orderbook updates, tracks walls and OFI,
 and writes:
-- latest.json (for near-real-time reads)
+- latest/<SYMBOL>.json or .msgpack (per-symbol near-real-time snapshot)
+- latest.json (small index: timestamp + symbols)
 - orderbook.db (optional history)
 
 Default output dir:
@@ -12,6 +13,14 @@ Default output dir:
 
 Override via:
   ORDERBOOK_DATA_DIR=/path/to/dir
+
+Snapshot format (json | msgpack, msgpack requires the msgpack package):
+  ORDERBOOK_LATEST_FORMAT=msgpack
+
+If uvloop is installed (Linux/macOS) it is used as the event loop.
+
+Snapshots are written to a temp file and renamed into place; fsync before the
+rename is off by default (enable with --fsync or ORDERBOOK_FSYNC=1).
 """
 
 from __future__ import annotations
@@ -23,7 +32,19 @@ import os
 import signal
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Set
+
+try:
+    import msgpack
+except ImportError:  # optional; only needed for --latest-format msgpack
+    msgpack = None
+
+try:
+    import uvloop
+except ImportError:  # optional; not available on Windows
+    uvloop = None
+
+LATEST_FORMATS = ("json", "msgpack")
 
 
 def _default_data_dir() -> Path:
@@ -62,19 +83,26 @@ class DaemonCollector:
         write_interval_sec: float = 2.0,
         ofi_interval_sec: float = 30.0,
         wall_snapshot_interval_sec: float = 300.0,
+        latest_format: str = "json",
+        fsync: bool = False,
     ):
         self.data_dir = data_dir
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
         self.latest_file = self.data_dir / "latest.json"
+        self.latest_dir = self.data_dir / "latest"
+        self.latest_dir.mkdir(parents=True, exist_ok=True)
         self.db_path = self.data_dir / "orderbook.db"
 
         import sys
 
         sys.path.insert(0, str(Path(__file__).parent))
         from src.collector import DataCollector  # type: ignore
+        from src.json_codec import dumps  # type: ignore
         from src.storage import Storage  # type: ignore
 
+        self._dumps = dumps
+
         self.storage = Storage(str(self.db_path))
         self.collector = DataCollector(symbols, thresholds)
 
@@ -85,17 +113,43 @@ class DaemonCollector:
         self.ofi_interval_sec = ofi_interval_sec
         self.wall_snapshot_interval_sec = wall_snapshot_interval_sec
 
-        self._last_write_ts = 0.0
-        self._last_ofi_ts = 0.0
-        self._last_wall_ts = 0.0
-
-        self.latest_data = {}
-
-    def _save_latest(self):
-        payload = {"timestamp": datetime.now().isoformat(), "data": self.latest_data}
-        tmp = self.latest_file.with_suffix(".json.tmp")
-        tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
-        tmp.replace(self.latest_file)
+        if latest_format == "msgpack" and msgpack is None:
+            print("msgpack is not installed; writing JSON snapshots instead")
+            latest_format = "json"
+        self.latest_format = latest_format
+        # replace() alone is atomic against crash-after-rename; fsync only adds durability
+        # of the new contents across power loss, at 1-10ms per file, so it is opt-in.
+        self.fsync = fsync
+
+        self.latest_data: Dict[str, dict] = {}
+        # Symbols updated since each job last ran; jobs only persist fresh state.
+        self._dirty: Set[str] = set()
+        self._ofi_dirty: Set[str] = set()
+        self._wall_dirty: Set[str] = set()
+        self._running = False
+        self._tasks: List[asyncio.Task] = []
+
+    def _write_atomic(self, path: Path, raw: bytes):
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(raw)
+        if self.fsync:
+            fd = os.open(tmp, os.O_WRONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        tmp.replace(path)
+
+    def _save_latest(self, snapshot: Dict[str, dict], symbols: List[str]):
+        for symbol, payload in snapshot.items():
+            if self.latest_format == "msgpack":
+                raw = msgpack.packb(payload, use_bin_type=True)
+            else:
+                raw = self._dumps(payload)
+            self._write_atomic(self.latest_dir / f"{symbol}.{self.latest_format}", raw)
+
+        index = {"timestamp": datetime.now().isoformat(), "symbols": symbols}
+        self._write_atomic(self.latest_file, self._dumps(index))
 
     async def on_update(self, data: dict):
         symbol = str(data.get("symbol", "")).upper()
@@ -103,22 +157,40 @@ class DaemonCollector:
             return
 
         self.latest_data[symbol] = data
-
-        now_ts = datetime.now().timestamp()
-
-        if now_ts - self._last_write_ts >= self.write_interval_sec:
-            self._save_latest()
-            self._last_write_ts = now_ts
-
-        if now_ts - self._last_ofi_ts >= self.ofi_interval_sec:
-            self.storage.save_ofi(symbol, data.get("ofi", {}))
-            self._last_ofi_ts = now_ts
-
-        if now_ts - self._last_wall_ts >= self.wall_snapshot_interval_sec:
+        self._dirty.add(symbol)
+        self._ofi_dirty.add(symbol)
+        self._wall_dirty.add(symbol)
+
+    async def _periodic(self, interval_sec: float, job):
+        while True:
+            await asyncio.sleep(interval_sec)
+            if not self._running:
+                return
+            try:
+                await job()
+            except Exception as e:
+                print(f"{job.__name__} failed: {e}")
+
+    async def _write_job(self):
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        snapshot = {symbol: self.latest_data[symbol] for symbol in dirty}
+        # Serialization and file I/O run in a worker thread so the WebSocket reader keeps draining frames.
+        await asyncio.to_thread(self._save_latest, snapshot, sorted(self.latest_data))
+
+    async def _ofi_job(self):
+        dirty, self._ofi_dirty = self._ofi_dirty, set()
+        for symbol in sorted(dirty):
+            self.storage.save_ofi(symbol, self.latest_data[symbol].get("ofi", {}))
+
+    async def _wall_job(self):
+        dirty, self._wall_dirty = self._wall_dirty, set()
+        for symbol in sorted(dirty):
+            data = self.latest_data[symbol]
             self.storage.save_wall_snapshot(symbol, "4h", data.get("wall_map_4h", {}))
             self.storage.save_wall_snapshot(symbol, "1h", data.get("wall_map_1h", {}))
             self.storage.save_wall_snapshot(symbol, "15min", data.get("wall_map_15min", {}))
-            self._last_wall_ts = now_ts
 
     async def start(self):
         self.collector.on_update(self.on_update)
@@ -129,9 +201,23 @@ class DaemonCollector:
         if self.thresholds:
             print(f"thresholds: {self.thresholds}")
         print("=" * 60)
-        await self.collector.start()
+
+        self._running = True
+        self._tasks = [
+            asyncio.create_task(self._periodic(self.write_interval_sec, self._write_job)),
+            asyncio.create_task(self._periodic(self.ofi_interval_sec, self._ofi_job)),
+            asyncio.create_task(self._periodic(self.wall_snapshot_interval_sec, self._wall_job)),
+        ]
+        try:
+            await self.collector.start()
+        finally:
+            self._running = False
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
 
     def stop(self):
+        self._running = False
         self.collector.stop()
         try:
             self.storage.close()
@@ -151,6 +237,18 @@ async def _main() -> int:
         type=float,
         default=float(os.getenv("ORDERBOOK_WALL_SNAPSHOT_INTERVAL_SEC", "300")),
     )
+    parser.add_argument(
+        "--latest-format",
+        choices=LATEST_FORMATS,
+        default=os.getenv("ORDERBOOK_LATEST_FORMAT", "json"),
+        help="Per-symbol snapshot format under latest/",
+    )
+    parser.add_argument(
+        "--fsync",
+        action=argparse.BooleanOptionalAction,
+        default=os.getenv("ORDERBOOK_FSYNC", "").lower() in ("1", "true", "yes"),
+        help="fsync snapshot files before the atomic rename (default: off)",
+    )
 
     args = parser.parse_args()
     data_dir = Path(args.data_dir).expanduser()
@@ -164,6 +262,8 @@ async def _main() -> int:
         write_interval_sec=args.write_interval_sec,
         ofi_interval_sec=args.ofi_interval_sec,
         wall_snapshot_interval_sec=args.wall_snapshot_interval_sec,
+        latest_format=args.latest_format,
+        fsync=args.fsync,
     )
 
     loop = asyncio.get_event_loop()
@@ -178,6 +278,10 @@ async def _main() -> int:
 
 
 def main() -> int:
+    if uvloop is not None:
+        # Faster socket I/O and task wake-ups for the WebSocket feed. uvloop.run() replaces
+        # uvloop.install(), which is deprecated on Python 3.12+.
+        return uvloop.run(_main())
     return asyncio.run(_main())
 
 
@@ -6,22 +6,56 @@ Data collector:
 """
 
 import asyncio
-import json
 import os
+import socket
+import time
 from datetime import datetime
-from typing import Callable, Dict, List
+from typing import Callable, Dict, List, Optional, Tuple
 
 import aiohttp
 
+from .json_codec import loads
 from .ofi_calculator import OFICalculator
-from .orderbook import OrderBookManager
+from .orderbook import OrderBookManager, fetch_tick_sizes
 from .wall_tracker import WallTracker
 
 
+DEPTH_STREAM = "depth20@500ms"
+
+# Per-callback backlog; when a consumer falls this far behind, its oldest updates are dropped.
+CALLBACK_QUEUE_SIZE = 1024
+
+# Client-side ping interval; a half-open connection is detected within ~2x this instead of hanging.
+WS_HEARTBEAT_SEC = 20.0
+
+
 def _ws_base() -> str:
     return os.getenv("ORDERBOOK_BINANCE_WS_URL", "wss://fstream.binance.com/ws")
 
 
+_iso_second: Tuple[int, str] = (-1, "")
+
+
+def _iso_timestamp(t_ns: int) -> str:
+    """Local-time ISO string like datetime.now().isoformat(); the date/time part is reformatted once per second."""
+    global _iso_second
+    sec, ns = divmod(t_ns, 1_000_000_000)
+    if sec != _iso_second[0]:
+        _iso_second = (sec, datetime.fromtimestamp(sec).isoformat(timespec="seconds"))
+    return f"{_iso_second[1]}.{ns // 1000:06d}"
+
+
+def _set_nodelay(ws: aiohttp.ClientWebSocketResponse):
+    """Disable Nagle on the WebSocket socket so small pong/control frames are not coalesced."""
+    sock = ws.get_extra_info("socket")
+    if sock is None:
+        return
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except (OSError, AttributeError):
+        pass
+
+
 class DataCollector:
     def __init__(self, symbols: List[str], thresholds: Dict[str, float] | None = None):
         self.symbols = symbols
@@ -31,7 +65,11 @@ class DataCollector:
         self.wall_trackers: Dict[str, WallTracker] = {}
         self.ofi_calculators: Dict[str, OFICalculator] = {}
 
+        # Exact combined-stream name -> symbol, so dispatch is a single dict lookup.
+        self._stream_symbols: Dict[str, str] = {}
+
         for symbol in symbols:
+            self._stream_symbols[f"{symbol.lower()}@{DEPTH_STREAM}"] = symbol
             self.managers[symbol] = OrderBookManager(symbol, depth=20)
             threshold = float(self.thresholds.get(symbol, 200_000))
             self.wall_trackers[symbol] = WallTracker(symbol, threshold_usd=threshold)
@@ -39,40 +77,105 @@ class DataCollector:
 
         self._running = False
         self._callbacks: List[Callable] = []
+        # One queue + worker task per callback, so a slow consumer never stalls the feed.
+        self._queues: List[asyncio.Queue] = []
+        self._workers: List[asyncio.Task] = []
 
     def on_update(self, callback: Callable):
         self._callbacks.append(callback)
+        self._queues.append(asyncio.Queue(maxsize=CALLBACK_QUEUE_SIZE))
+        if self._running:
+            self._workers.append(asyncio.create_task(self._callback_worker(callback, self._queues[-1])))
+
+    async def _callback_worker(self, callback: Callable, queue: asyncio.Queue):
+        is_coro = asyncio.iscoroutinefunction(callback)
+        while True:
+            update_data = await queue.get()
+            try:
+                if is_coro:
+                    await callback(update_data)
+                else:
+                    callback(update_data)
+            except Exception:
+                pass
+            finally:
+                queue.task_done()
+
+    def _dispatch(self, update_data: dict):
+        for queue in self._queues:
+            if queue.full():
+                queue.get_nowait()
+                queue.task_done()
+            queue.put_nowait(update_data)
+
+    def _start_workers(self):
+        self._workers = [
+            asyncio.create_task(self._callback_worker(callback, queue))
+            for callback, queue in zip(self._callbacks, self._queues)
+        ]
+
+    async def _stop_workers(self, timeout: Optional[float] = 1.0):
+        # Give workers a moment to hand off what is already queued, then cancel them.
+        pending = [queue.join() for queue in self._queues if queue.qsize()]
+        if pending:
+            try:
+                await asyncio.wait_for(asyncio.gather(*pending), timeout)
+            except asyncio.TimeoutError:
+                pass
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
 
     async def start(self):
         self._running = True
-
-        async with aiohttp.ClientSession() as session:
+        self._start_workers()
+        try:
+            await self._run()
+        finally:
+            self._running = False
+            await self._stop_workers()
+
+    async def _run(self):
+        # One session (and connection pool / DNS cache) is shared by REST resyncs and every reconnect.
+        connector = aiohttp.TCPConnector(limit=0, ttl_dns_cache=300)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await self._load_tick_sizes(session)
             init_tasks = [self.managers[s].initialize(session) for s in self.symbols]
             await asyncio.gather(*init_tasks)
 
-            streams = [f"{s.lower()}@depth20@500ms" for s in self.symbols]
-            ws_url = f"{_ws_base()}/stream?streams={'/'.join(streams)}"
+            ws_url = f"{_ws_base()}/stream?streams={'/'.join(self._stream_symbols)}"
 
             while self._running:
                 try:
-                    async with session.ws_connect(ws_url) as ws:
+                    async with session.ws_connect(ws_url, heartbeat=WS_HEARTBEAT_SEC, compress=0) as ws:
+                        _set_nodelay(ws)
                         async for msg in ws:
-                            if msg.type == aiohttp.WSMsgType.TEXT:
+                            if msg.type == aiohttp.WSMsgType.TEXT or msg.type == aiohttp.WSMsgType.BINARY:
                                 await self._handle_message(msg.data, session)
                             elif msg.type == aiohttp.WSMsgType.ERROR:
                                 break
                 except Exception:
                     await asyncio.sleep(5)
 
-    async def _handle_message(self, data: str, session: aiohttp.ClientSession):
+    async def _load_tick_sizes(self, session: aiohttp.ClientSession):
+        # Wall keys fall back to DEFAULT_TICK_SIZE when exchangeInfo is unavailable.
         try:
-            msg = json.loads(data)
-            stream = msg.get("stream", "")
-            event = msg.get("data", {})
+            tick_sizes = await fetch_tick_sizes(session)
+        except Exception:
+            return
+        for symbol, tracker in self.wall_trackers.items():
+            tick = tick_sizes.get(symbol)
+            if tick:
+                tracker.set_tick_size(tick)
 
-            symbol = stream.split("@")[0].upper()
-            if symbol not in self.managers:
+    async def _handle_message(self, data: str | bytes, session: aiohttp.ClientSession):
+        try:
+            msg = loads(data)
+            symbol = self._stream_symbols.get(msg.get("stream", ""))
+            if symbol is None:
                 return
+            event = msg.get("data", {})
 
             manager = self.managers[symbol]
             success = manager.process_update(event)
@@ -81,12 +184,14 @@ class DataCollector:
                 return
 
             orderbook = manager.get_snapshot()
-            wall_events = self.wall_trackers[symbol].update(orderbook)
+            wall_events = self.wall_trackers[symbol].update(orderbook, removed=manager.take_removed())
             ofi_state = self.ofi_calculators[symbol].update(orderbook)
 
+            now_ns = time.time_ns()
             update_data = {
                 "symbol": symbol,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": _iso_timestamp(now_ns),
+                "timestamp_ns": now_ns,
                 "orderbook": {
                     "best_bid": orderbook.best_bid,
                     "best_ask": orderbook.best_ask,
@@ -105,14 +210,7 @@ class DataCollector:
                 "wall_map_15min": self.wall_trackers[symbol].get_wall_map("15min"),
             }
 
-            for callback in self._callbacks:
-                try:
-                    if asyncio.iscoroutinefunction(callback):
-                        await callback(update_data)
-                    else:
-                        callback(update_data)
-                except Exception:
-                    continue
+            self._dispatch(update_data)
         except Exception:
             return
 
@@ -0,0 +1,28 @@
+"""
+JSON encode/decode shared by the collector, storage and the CLIs.
+
+Uses orjson when it is installed and stdlib json otherwise.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used otherwise
+    orjson = None
+
+
+# orjson.loads accepts str directly, so WebSocket TEXT frames need no re-encoding.
+loads = orjson.loads if orjson is not None else json.loads
+
+
+def dumps(data: Any) -> bytes:
+    """UTF-8 encoded JSON; non-ASCII text is kept as-is on both paths."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def dumps_str(data: Any) -> str:
+    return dumps(data).decode("utf-8")
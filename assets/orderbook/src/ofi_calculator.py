@@ -1,17 +1,28 @@
 """
 OFI (Order Flow Imbalance) calculator.
 
-Keeps internal history to compute a simple z-score. Implemented without numpy to
-minimize runtime dependencies.
+Keeps a rolling window of raw OFI to compute a simple z-score. The window's
+mean/variance are maintained incrementally (sliding Welford) and JIT-compiled
+with numba when it is installed.
 """
 
 from dataclasses import dataclass
-from collections import deque
-from typing import Deque, List, Tuple
 import math
 
+import numpy as np
 
-@dataclass
+try:
+    from numba import njit
+except ImportError:  # optional; the kernels below then run as plain Python
+
+    def njit(*args, **kwargs):
+        def wrap(fn):
+            return fn
+
+        return wrap
+
+
+@dataclass(slots=True)
 class OFIState:
     raw: float = 0.0
     ema: float = 0.0
@@ -20,12 +31,73 @@ class OFIState:
     signal: str = "NEUTRAL"
 
 
-def _std(values: List[float]) -> float:
-    if not values:
-        return 0.0
-    mean = sum(values) / len(values)
-    var = sum((v - mean) ** 2 for v in values) / len(values)
-    return math.sqrt(var)
+@njit(cache=True)
+def _window_push(ring, pos, count, mean, m2, x):
+    """Push x into the ring buffer, evicting the oldest sample once full. Returns (pos, count, mean, m2)."""
+    size = ring.shape[0]
+    if count < size:
+        count += 1
+        delta = x - mean
+        mean += delta / count
+        m2 += delta * (x - mean)
+    else:
+        old = ring[pos]
+        new_mean = mean + (x - old) / size
+        m2 += (x - old) * (x - new_mean + old - mean)
+        mean = new_mean
+    ring[pos] = x
+    pos += 1
+    if pos == size:
+        pos = 0
+        # Re-derive from the window once per wrap so rounding error cannot accumulate.
+        mean = 0.0
+        for k in range(count):
+            mean += ring[k]
+        mean /= count
+        m2 = 0.0
+        for k in range(count):
+            m2 += (ring[k] - mean) ** 2
+    if m2 < 0.0:
+        m2 = 0.0
+    return pos, count, mean, m2
+
+
+SIGNALS = ("NEUTRAL", "BUY", "STRONG_BUY", "SELL", "STRONG_SELL")
+# Ascending |z| thresholds: exceeding the i-th one reaches level i + 1 (BUY/SELL, then STRONG_*).
+SIGNAL_LEVELS = (1.0, 2.0)
+MIN_SAMPLES = 20
+
+
+@njit(cache=True)
+def _signal_code(z_score):
+    """Index into SIGNALS: count the thresholds |z| strictly exceeds, then pick the sell half for z < 0."""
+    mag = abs(z_score)
+    level = 0
+    for threshold in SIGNAL_LEVELS:
+        level += mag > threshold
+    if level and z_score < 0:
+        level += len(SIGNAL_LEVELS)
+    return level
+
+
+@njit(cache=True)
+def _ofi_step(raw, ema, alpha, initialized, ring, pos, count, mean, m2):
+    """EMA + window statistics + z-score + signal for one tick. Returns (ema, std, z, signal, pos, count, mean, m2)."""
+    if initialized:
+        ema = alpha * raw + (1 - alpha) * ema
+    else:
+        ema = raw
+
+    pos, count, mean, m2 = _window_push(ring, pos, count, mean, m2, raw)
+
+    if count >= MIN_SAMPLES:
+        std = math.sqrt(m2 / count)
+        z_score = ema / std if std > 0 else 0.0
+    else:
+        std = 1.0
+        z_score = 0.0
+
+    return ema, std, z_score, _signal_code(z_score), pos, count, mean, m2
 
 
 class OFICalculator:
@@ -34,76 +106,67 @@ class OFICalculator:
         self.ema_span = ema_span
         self.alpha = 2 / (ema_span + 1)
 
-        self._prev_bids: List[Tuple[float, float]] | None = None
-        self._prev_asks: List[Tuple[float, float]] | None = None
+        # Previous top-`depth` quantity totals; nothing per price is needed (see _calculate_raw_ofi).
+        self._prev_bid_total: float | None = None
+        self._prev_ask_total: float | None = None
         self._ema = 0.0
-        self._history: Deque[float] = deque(maxlen=history_size)
+        self._ring = np.zeros(history_size, dtype=np.float64)
+        self._pos = 0
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
         self._initialized = False
 
     def update(self, orderbook) -> OFIState:
-        bids = [(l.price, l.quantity) for l in orderbook.bids[: self.depth]]
-        asks = [(l.price, l.quantity) for l in orderbook.asks[: self.depth]]
+        bid_total = float(orderbook.bids_qty[: self.depth].sum())
+        ask_total = float(orderbook.asks_qty[: self.depth].sum())
 
-        if self._prev_bids is None:
-            self._prev_bids = bids
-            self._prev_asks = asks
+        if self._prev_bid_total is None:
+            self._prev_bid_total = bid_total
+            self._prev_ask_total = ask_total
             return OFIState()
 
-        raw_ofi = self._calculate_raw_ofi(bids, asks)
-
-        if not self._initialized:
-            self._ema = raw_ofi
-            self._initialized = True
-        else:
-            self._ema = self.alpha * raw_ofi + (1 - self.alpha) * self._ema
-
-        self._history.append(raw_ofi)
-
-        if len(self._history) >= 20:
-            std = float(_std(list(self._history)))
-            z_score = self._ema / std if std > 0 else 0.0
-        else:
-            std = 1.0
-            z_score = 0.0
-
-        signal = self._get_signal(z_score)
-
-        self._prev_bids = bids
-        self._prev_asks = asks
+        raw_ofi = self._calculate_raw_ofi(bid_total, ask_total)
+
+        ema, std, z_score, code, self._pos, self._count, self._mean, self._m2 = _ofi_step(
+            raw_ofi,
+            self._ema,
+            self.alpha,
+            self._initialized,
+            self._ring,
+            self._pos,
+            self._count,
+            self._mean,
+            self._m2,
+        )
+        self._ema = ema
+        self._initialized = True
+        signal = SIGNALS[code]
+
+        self._prev_bid_total = bid_total
+        self._prev_ask_total = ask_total
 
         return OFIState(raw=raw_ofi, ema=self._ema, std=std, z_score=z_score, signal=signal)
 
-    def _calculate_raw_ofi(self, bids, asks) -> float:
-        prev_bid_map = {p: q for p, q in (self._prev_bids or [])}
-        prev_ask_map = {p: q for p, q in (self._prev_asks or [])}
-        curr_bid_map = {p: q for p, q in bids}
-        curr_ask_map = {p: q for p, q in asks}
-
-        bid_delta = 0.0
-        for price in set(prev_bid_map.keys()) | set(curr_bid_map.keys()):
-            bid_delta += curr_bid_map.get(price, 0) - prev_bid_map.get(price, 0)
-
-        ask_delta = 0.0
-        for price in set(prev_ask_map.keys()) | set(curr_ask_map.keys()):
-            ask_delta += curr_ask_map.get(price, 0) - prev_ask_map.get(price, 0)
-
+    def _calculate_raw_ofi(self, bid_total: float, ask_total: float) -> float:
+        # Summing curr(p) - prev(p) over the union of prices (absent = 0) telescopes to
+        # sum(curr) - sum(prev): each side holds unique prices, so no merge or key matching is
+        # needed, and each side's total is computed once per tick and carried to the next.
+        bid_delta = bid_total - self._prev_bid_total
+        ask_delta = ask_total - self._prev_ask_total
         return bid_delta - ask_delta
 
     def _get_signal(self, z_score: float) -> str:
-        if z_score > 2.0:
-            return "STRONG_BUY"
-        if z_score > 1.0:
-            return "BUY"
-        if z_score < -2.0:
-            return "STRONG_SELL"
-        if z_score < -1.0:
-            return "SELL"
-        return "NEUTRAL"
+        return SIGNALS[_signal_code(z_score)]
 
     def reset(self):
-        self._prev_bids = None
-        self._prev_asks = None
+        self._prev_bid_total = None
+        self._prev_ask_total = None
         self._ema = 0.0
-        self._history.clear()
+        self._ring.fill(0.0)
+        self._pos = 0
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
         self._initialized = False
 
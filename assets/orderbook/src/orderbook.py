@@ -2,22 +2,44 @@
 OrderBook state machine.
 
 Tracks L2 snapshots and incremental updates for Binance futures.
+Published snapshots store each side as parallel price/qty numpy arrays.
 """
 
 import os
 import time
-import copy
 from dataclasses import dataclass, field
-from typing import List, Optional
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
 
 import aiohttp
+import numpy as np
+from sortedcontainers import SortedDict
+
+LEVEL_DTYPE = np.dtype([("p", "f8"), ("q", "f8")])
 
 
 def _rest_base() -> str:
     return os.getenv("ORDERBOOK_BINANCE_REST_URL", "https://fapi.binance.com")
 
 
-@dataclass
+async def fetch_tick_sizes(session: aiohttp.ClientSession, rest_url: Optional[str] = None) -> Dict[str, float]:
+    """Symbol -> PRICE_FILTER tickSize from /fapi/v1/exchangeInfo (one request covers every symbol)."""
+    url = f"{rest_url or _rest_base()}/fapi/v1/exchangeInfo"
+    async with session.get(url) as resp:
+        data = await resp.json()
+
+    tick_sizes: Dict[str, float] = {}
+    for info in data.get("symbols", []):
+        for f in info.get("filters", []):
+            if f.get("filterType") == "PRICE_FILTER":
+                tick = float(f.get("tickSize", 0))
+                if tick > 0:
+                    tick_sizes[info["symbol"]] = tick
+                break
+    return tick_sizes
+
+
+@dataclass(slots=True)
 class PriceLevel:
     price: float
     quantity: float
@@ -27,21 +49,35 @@ class PriceLevel:
         return self.price * self.quantity
 
 
-@dataclass
+def _empty() -> np.ndarray:
+    return np.empty(0, dtype=np.float64)
+
+
+@dataclass(slots=True)
 class OrderBook:
     symbol: str
-    bids: List[PriceLevel] = field(default_factory=list)
-    asks: List[PriceLevel] = field(default_factory=list)
+    bids_price: np.ndarray = field(default_factory=_empty)
+    bids_qty: np.ndarray = field(default_factory=_empty)
+    asks_price: np.ndarray = field(default_factory=_empty)
+    asks_qty: np.ndarray = field(default_factory=_empty)
     last_update_id: int = 0
     timestamp: float = 0
 
+    @property
+    def bids(self) -> List[PriceLevel]:
+        return [PriceLevel(p, q) for p, q in zip(self.bids_price.tolist(), self.bids_qty.tolist())]
+
+    @property
+    def asks(self) -> List[PriceLevel]:
+        return [PriceLevel(p, q) for p, q in zip(self.asks_price.tolist(), self.asks_qty.tolist())]
+
     @property
     def best_bid(self) -> Optional[float]:
-        return self.bids[0].price if self.bids else None
+        return float(self.bids_price[0]) if self.bids_price.size else None
 
     @property
     def best_ask(self) -> Optional[float]:
-        return self.asks[0].price if self.asks else None
+        return float(self.asks_price[0]) if self.asks_price.size else None
 
     @property
     def mid_price(self) -> Optional[float]:
@@ -62,19 +98,44 @@ class OrderBookManager:
         self.depth = depth
         self.rest_url = rest_url or _rest_base()
         self.orderbook = OrderBook(symbol=symbol)
+        # price -> qty, kept in book order: bids keyed by -price (best first), asks by price
+        self._bids: SortedDict = SortedDict()
+        self._asks: SortedDict = SortedDict()
+        # Prices that left each side (deleted or trimmed past depth) since take_removed() was last
+        # called, including updates that were applied but then rejected (crossed book).
+        # None after initialize(): the whole book was replaced, so the consumer must rescan.
+        self._removed_bids: Optional[List[float]] = None
+        self._removed_asks: Optional[List[float]] = None
         self._last_u = 0
         self._initialized = False
 
+    def take_removed(self) -> Optional[Tuple[List[float], List[float]]]:
+        """
+        Return (bid_prices, ask_prices) that left the book since the previous call and reset
+        the accumulator; None means the book was re-initialized in between and must be rescanned.
+        """
+        bids, asks = self._removed_bids, self._removed_asks
+        self._removed_bids = []
+        self._removed_asks = []
+        if bids is None or asks is None:
+            return None
+        # A price removed by one update may have been re-added by a later one.
+        return (
+            [p for p in dict.fromkeys(bids) if -p not in self._bids],
+            [p for p in dict.fromkeys(asks) if p not in self._asks],
+        )
+
     async def initialize(self, session: aiohttp.ClientSession):
         url = f"{self.rest_url}/fapi/v1/depth"
         params = {"symbol": self.symbol, "limit": self.depth}
         async with session.get(url, params=params) as resp:
             data = await resp.json()
 
-        self.orderbook.bids = [PriceLevel(float(p), float(q)) for p, q in data["bids"]]
-        self.orderbook.asks = [PriceLevel(float(p), float(q)) for p, q in data["asks"]]
-        self.orderbook.last_update_id = data["lastUpdateId"]
-        self.orderbook.timestamp = time.time()
+        self._bids = SortedDict((-float(p), float(q)) for p, q in data["bids"])
+        self._asks = SortedDict((float(p), float(q)) for p, q in data["asks"])
+        self._removed_bids = None
+        self._removed_asks = None
+        self._publish(data["lastUpdateId"])
         self._last_u = data["lastUpdateId"]
         self._initialized = True
 
@@ -93,14 +154,13 @@ class OrderBookManager:
             if pu != self._last_u:
                 return False
 
-        self._apply_update(event["b"], self.orderbook.bids, reverse=True)
-        self._apply_update(event["a"], self.orderbook.asks, reverse=False)
-
-        self.orderbook.bids = self.orderbook.bids[: self.depth]
-        self.orderbook.asks = self.orderbook.asks[: self.depth]
-
-        self.orderbook.last_update_id = u
-        self.orderbook.timestamp = time.time()
+        removed_bids = self._apply_update(event["b"], self._bids, sign=-1.0)
+        removed_asks = self._apply_update(event["a"], self._asks, sign=1.0)
+        if self._removed_bids is not None:
+            self._removed_bids.extend(removed_bids)
+        if self._removed_asks is not None:
+            self._removed_asks.extend(removed_asks)
+        self._publish(u)
         self._last_u = u
 
         if self.orderbook.best_bid and self.orderbook.best_ask:
@@ -109,21 +169,51 @@ class OrderBookManager:
 
         return True
 
-    def _apply_update(self, updates: List, book_side: List[PriceLevel], reverse: bool):
-        price_map = {level.price: level for level in book_side}
-
+    def _apply_update(self, updates: List, book_side: SortedDict, sign: float) -> List[float]:
+        # Binance levels are fixed [price_str, qty_str] pairs; bind the per-level calls once.
+        # (np.asarray(updates, dtype=float64) was measured slower than float() for 20-level frames.)
+        removed: List[float] = []
+        pop = book_side.pop
+        setitem = book_side.__setitem__
         for price_str, qty_str in updates:
-            price = float(price_str)
+            key = sign * float(price_str)
             qty = float(qty_str)
 
             if qty == 0:
-                price_map.pop(price, None)
+                if pop(key, None) is not None:
+                    removed.append(key)
             else:
-                price_map[price] = PriceLevel(price, qty)
-
-        book_side.clear()
-        book_side.extend(sorted(price_map.values(), key=lambda x: x.price, reverse=reverse))
+                setitem(key, qty)
+
+        # Levels beyond depth are dropped, as before.
+        if len(book_side) > self.depth:
+            popitem = book_side.popitem
+            for _ in range(len(book_side) - self.depth):
+                removed.append(popitem()[0])
+        if not removed:
+            return removed
+        # A price deleted and re-added within one event is still in the book.
+        return [sign * key for key in removed if key not in book_side]
+
+    def _publish(self, last_update_id: int):
+        # Each update publishes a fresh OrderBook; published snapshots are never mutated afterwards.
+        bids = self._levels(self._bids)
+        asks = self._levels(self._asks)
+        self.orderbook = OrderBook(
+            symbol=self.symbol,
+            bids_price=-bids["p"],
+            bids_qty=bids["q"],
+            asks_price=asks["p"],
+            asks_qty=asks["q"],
+            last_update_id=last_update_id,
+            timestamp=time.time(),
+        )
+
+    def _levels(self, book_side: SortedDict) -> np.ndarray:
+        count = min(len(book_side), self.depth)
+        return np.fromiter(islice(book_side.items(), count), dtype=LEVEL_DTYPE, count=count)
 
     def get_snapshot(self) -> OrderBook:
-        return copy.deepcopy(self.orderbook)
+        # Safe to share: consumers only read, and the next update replaces self.orderbook.
+        return self.orderbook
 
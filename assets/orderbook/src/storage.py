@@ -1,18 +1,53 @@
 """
 SQLite storage for snapshots and OFI history.
+
+Inserts are queued and written by a background thread that owns its own
+connection: each batch (up to flush_rows rows, or whatever arrived within
+flush_interval seconds) is committed in a single transaction, so callers on
+the event loop never wait for SQLite. flush() blocks until the queue is
+drained; close() drains and stops the writer.
 """
 
-import json
+import queue
 import sqlite3
+import threading
+import time
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .json_codec import dumps_str
+
+INSERT_WALL = "INSERT INTO wall_snapshots (symbol, timestamp, timeframe, data) VALUES (?, ?, ?, ?)"
+INSERT_OFI = "INSERT INTO ofi_history (symbol, timestamp, raw, ema, z_score, signal) VALUES (?, ?, ?, ?, ?, ?)"
+INSERT_SIGNAL = "INSERT INTO signal_log (symbol, timestamp, signal_type, price, details) VALUES (?, ?, ?, ?, ?)"
+
+_STOP = object()
+
+
+def _utc_now() -> str:
+    # Same format as SQLite CURRENT_TIMESTAMP; captured at enqueue time, not flush time.
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
 
 
 class Storage:
-    def __init__(self, db_path: str = "data/orderbook.db"):
+    def __init__(self, db_path: str = "data/orderbook.db", flush_rows: int = 256, flush_interval: float = 0.1):
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
-        self.conn = sqlite3.connect(db_path)
+        self.db_path = db_path
+        self.conn = self._connect()
         self._init_tables()
 
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
     def _init_tables(self):
         cursor = self.conn.cursor()
         cursor.executescript(
@@ -53,34 +88,65 @@ class Storage:
         )
         self.conn.commit()
 
+    def _enqueue(self, sql: str, row: Tuple):
+        # The writer thread is started lazily so read-only users (query.py history) never spawn it.
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="storage-writer", daemon=True)
+            self._writer.start()
+        self._queue.put((sql, row))
+
+    def _write_loop(self):
+        conn = self._connect()
+        try:
+            stop = False
+            while not stop:
+                batch = [self._queue.get()]
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.flush_rows:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=timeout))
+                    except queue.Empty:
+                        break
+
+                rows: Dict[str, List[Tuple]] = {}
+                for item in batch:
+                    if item is _STOP:
+                        stop = True
+                    else:
+                        rows.setdefault(item[0], []).append(item[1])
+                try:
+                    with conn:
+                        for sql, params in rows.items():
+                            conn.executemany(sql, params)
+                except sqlite3.Error as e:
+                    print(f"storage: dropped {sum(len(v) for v in rows.values())} rows: {e}")
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+        finally:
+            conn.close()
+
     def save_wall_snapshot(self, symbol: str, timeframe: str, data: dict):
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "INSERT INTO wall_snapshots (symbol, timeframe, data) VALUES (?, ?, ?)",
-            (symbol, timeframe, json.dumps(data)),
-        )
-        self.conn.commit()
+        self._enqueue(INSERT_WALL, (symbol, _utc_now(), timeframe, dumps_str(data)))
 
     def save_ofi(self, symbol: str, ofi_state):
-        cursor = self.conn.cursor()
         raw = ofi_state.raw if hasattr(ofi_state, "raw") else ofi_state.get("raw", 0)
         ema = ofi_state.ema if hasattr(ofi_state, "ema") else ofi_state.get("ema", 0)
         z_score = ofi_state.z_score if hasattr(ofi_state, "z_score") else ofi_state.get("z_score", 0)
         signal = ofi_state.signal if hasattr(ofi_state, "signal") else ofi_state.get("signal", "NEUTRAL")
 
-        cursor.execute(
-            "INSERT INTO ofi_history (symbol, raw, ema, z_score, signal) VALUES (?, ?, ?, ?, ?)",
-            (symbol, raw, ema, z_score, signal),
-        )
-        self.conn.commit()
+        self._enqueue(INSERT_OFI, (symbol, _utc_now(), raw, ema, z_score, signal))
+
+    def flush(self):
+        """Block until every queued row has been committed."""
+        if self._writer is not None:
+            self._queue.join()
 
     def log_signal(self, symbol: str, signal_type: str, price: float, details: dict):
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "INSERT INTO signal_log (symbol, signal_type, price, details) VALUES (?, ?, ?, ?)",
-            (symbol, signal_type, price, json.dumps(details)),
-        )
-        self.conn.commit()
+        self._enqueue(INSERT_SIGNAL, (symbol, _utc_now(), signal_type, price, dumps_str(details)))
 
     def get_recent_walls(self, symbol: str, timeframe: str, limit: int = 100):
         cursor = self.conn.cursor()
@@ -107,5 +173,11 @@ class Storage:
         return cursor.fetchall()
 
     def close(self):
-        self.conn.close()
+        try:
+            if self._writer is not None:
+                self._queue.put(_STOP)
+                self._writer.join()
+                self._writer = None
+        finally:
+            self.conn.close()
 
@@ -3,11 +3,14 @@ Wall Map tracker.
 Tracks large orderbook levels ("walls") and their lifecycle.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+import heapq
 import time
 
+import numpy as np
+
 
 WALL_PARAMS = {
     "4h": {"min_age_minutes": 120, "min_persistence": 150, "influence_zone_pct": 0.005},
@@ -16,12 +19,20 @@ WALL_PARAMS = {
 }
 
 
+# Wall maps report ages at 0.1 minute resolution, so a cached map is reused for at most this long.
+WALL_MAP_REFRESH_SEC = 6.0
+
+# Walls are keyed by integer price ticks. Until the exchange tick size is known, use the finest
+# price precision Binance lists, which keeps distinct prices distinct.
+DEFAULT_TICK_SIZE = 1e-8
+
+
 class WallSide(Enum):
     BID = "bid"
     ASK = "ask"
 
 
-@dataclass
+@dataclass(slots=True)
 class Wall:
     price: float
     side: WallSide
@@ -32,43 +43,48 @@ class Wall:
     replenish_count: int = 0
     test_count: int = 0
     peak_qty: float = 0
+    # Derived values, kept in sync by set_qty() / refresh_persistence() instead of recomputed per read.
+    notional: float = field(default=0.0, init=False)
+    health: float = field(default=0.0, init=False)
+    persistence_factor: float = field(default=0.5, init=False)
 
     def __post_init__(self):
         self.peak_qty = max(self.peak_qty, self.initial_qty)
+        self.set_qty(self.current_qty)
+        self.refresh_persistence()
+
+    def set_qty(self, qty: float):
+        self.current_qty = qty
+        if qty > self.peak_qty:
+            self.peak_qty = qty
+        self.notional = self.price * qty
+        self.health = 0 if self.peak_qty == 0 else min(1.0, qty / self.peak_qty)
+
+    def refresh_persistence(self):
+        # Call after replenish_count / test_count change.
+        if self.test_count == 0:
+            self.persistence_factor = 0.5
+        else:
+            self.persistence_factor = 1 + self.replenish_count / max(1, self.test_count)
 
-    @property
-    def age_minutes(self) -> float:
-        return (time.time() - self.first_seen) / 60
-
-    @property
-    def notional(self) -> float:
-        return self.price * self.current_qty
-
-    @property
-    def health(self) -> float:
-        if self.peak_qty == 0:
-            return 0
-        return min(1.0, self.current_qty / self.peak_qty)
+    def age_minutes_at(self, now: float) -> float:
+        return (now - self.first_seen) / 60
 
-    @property
-    def persistence_score(self) -> float:
-        if self.test_count == 0:
-            return self.age_minutes * 0.5
-        replenish_ratio = self.replenish_count / max(1, self.test_count)
-        return self.age_minutes * (1 + replenish_ratio)
+    def persistence_score_at(self, now: float) -> float:
+        return self.age_minutes_at(now) * self.persistence_factor
 
-    def is_real(self, timeframe: str) -> bool:
+    def is_real_at(self, timeframe: str, now: float) -> bool:
         params = WALL_PARAMS.get(timeframe, WALL_PARAMS["1h"])
-        return self.age_minutes >= params["min_age_minutes"] and self.persistence_score >= params["min_persistence"]
+        return self.age_minutes_at(now) >= params["min_age_minutes"] and self.persistence_score_at(now) >= params["min_persistence"]
 
-    def to_dict(self) -> dict:
+    def to_dict(self, now: float) -> dict:
         return {
             "price": self.price,
             "side": self.side.value,
             "current_qty": self.current_qty,
             "notional": self.notional,
-            "age_minutes": round(self.age_minutes, 1),
-            "persistence_score": round(self.persistence_score, 1),
+            "age_minutes": round(self.age_minutes_at(now), 1),
+            "persistence_score": round(self.persistence_score_at(now), 1),
             "health": round(self.health, 2),
             "replenish_count": self.replenish_count,
             "test_count": self.test_count,
@@ -76,96 +92,165 @@ class Wall:
 
 
 class WallTracker:
-    def __init__(self, symbol: str, threshold_usd: float = 200_000):
+    def __init__(self, symbol: str, threshold_usd: float = 200_000, tick_size: float = DEFAULT_TICK_SIZE):
         self.symbol = symbol
         self.threshold = threshold_usd
-        self.walls: Dict[Tuple[float, WallSide], Wall] = {}
-
-    def update(self, orderbook) -> List[dict]:
+        self.tick_size = tick_size
+        # (price in ticks, side) -> Wall; int keys hash faster than floats and compare exactly.
+        self.walls: Dict[Tuple[int, WallSide], Wall] = {}
+        # Bumped whenever a wall is added/removed or a field shown in the wall map changes.
+        self._walls_version = 0
+        self._map_cache: Dict[str, Tuple[Tuple[int, int], dict]] = {}
+
+    def set_tick_size(self, tick_size: float):
+        """Switch to the symbol's exchange tick size, re-keying any walls already tracked."""
+        if tick_size <= 0 or tick_size == self.tick_size:
+            return
+        self.tick_size = tick_size
+        self.walls = {(self._tick(wall.price), side): wall for (_, side), wall in self.walls.items()}
+
+    def _tick(self, price: float) -> int:
+        return round(price / self.tick_size)
+
+    def _ticks(self, prices: np.ndarray) -> List[int]:
+        # np.rint rounds half to even like round(), so both paths produce the same keys.
+        return np.rint(prices / self.tick_size).astype(np.int64).tolist()
+
+    def update(self, orderbook, removed: Optional[Tuple[List[float], List[float]]] = None) -> List[dict]:
+        """
+        `removed` is an optional (bid_prices, ask_prices) hint of levels that left the book
+        since the previous update (OrderBookManager.take_removed()); without it every tracked
+        wall is checked against the current book.
+        """
         events: List[dict] = []
         current_price = orderbook.mid_price
+        now = time.time()
 
-        events.extend(self._process_side(orderbook.bids, WallSide.BID, current_price))
-        events.extend(self._process_side(orderbook.asks, WallSide.ASK, current_price))
-        events.extend(self._cleanup_dead_walls(orderbook))
+        events.extend(self._process_side(orderbook.bids_price, orderbook.bids_qty, WallSide.BID, current_price, now))
+        events.extend(self._process_side(orderbook.asks_price, orderbook.asks_qty, WallSide.ASK, current_price, now))
+        if removed is None:
+            events.extend(self._cleanup_dead_walls(orderbook, now))
+        else:
+            events.extend(self._remove_walls(removed[0], WallSide.BID, now))
+            events.extend(self._remove_walls(removed[1], WallSide.ASK, now))
 
         return events
 
-    def _process_side(self, levels: List, side: WallSide, current_price: float) -> List[dict]:
+    def _process_side(
+        self, prices: np.ndarray, qtys: np.ndarray, side: WallSide, current_price: float, now: float
+    ) -> List[dict]:
         events: List[dict] = []
 
-        for level in levels:
-            price = level.price
-            qty = level.quantity
-            notional = level.notional
-            key = (price, side)
-
-            if notional >= self.threshold:
-                if key in self.walls:
-                    wall = self.walls[key]
-                    old_qty = wall.current_qty
-
-                    if qty > old_qty * 1.2:
-                        wall.replenish_count += 1
-                        events.append({"type": "WALL_REPLENISH", "wall": wall.to_dict()})
-
-                    if current_price:
-                        distance = abs(current_price - price) / price
-                        if distance < 0.003:
-                            wall.test_count += 1
-
-                    wall.current_qty = qty
-                    wall.peak_qty = max(wall.peak_qty, qty)
-                    wall.last_seen = time.time()
-                else:
-                    wall = Wall(
-                        price=price,
-                        side=side,
-                        initial_qty=qty,
-                        current_qty=qty,
-                        first_seen=time.time(),
-                        last_seen=time.time(),
-                    )
-                    self.walls[key] = wall
-                    events.append({"type": "NEW_WALL", "wall": wall.to_dict()})
+        # Only levels at or above the notional threshold are visited.
+        (idx,) = np.nonzero(prices * qtys >= self.threshold)
+        wall_prices = prices[idx]
+        for tick, price, qty in zip(self._ticks(wall_prices), wall_prices.tolist(), qtys[idx].tolist()):
+            key = (tick, side)
+
+            if key in self.walls:
+                wall = self.walls[key]
+                old_qty = wall.current_qty
+
+                changed = qty != old_qty
+
+                if qty > old_qty * 1.2:
+                    wall.replenish_count += 1
+                    wall.refresh_persistence()
+                    events.append({"type": "WALL_REPLENISH", "wall": wall.to_dict(now)})
+
+                if current_price:
+                    distance = abs(current_price - price) / price
+                    if distance < 0.003:
+                        wall.test_count += 1
+                        wall.refresh_persistence()
+                        changed = True
+
+                if qty != old_qty:
+                    wall.set_qty(qty)
+                if changed:
+                    self._walls_version += 1
+                wall.last_seen = now
+            else:
+                wall = Wall(
+                    price=price,
+                    side=side,
+                    initial_qty=qty,
+                    current_qty=qty,
+                    first_seen=now,
+                    last_seen=now,
+                )
+                self.walls[key] = wall
+                self._walls_version += 1
+                events.append({"type": "NEW_WALL", "wall": wall.to_dict(now)})
 
         return events
 
-    def _cleanup_dead_walls(self, orderbook) -> List[dict]:
+    @staticmethod
+    def _removed_event(wall: Wall, now: float) -> dict:
+        return {
+            "type": "WALL_REMOVED",
+            "wall": wall.to_dict(now),
+            "reason": "consumed" if wall.test_count > 0 else "cancelled",
+        }
+
+    def _remove_walls(self, prices: List[float], side: WallSide, now: float) -> List[dict]:
+        events: List[dict] = []
+        for price in prices:
+            wall = self.walls.pop((self._tick(price), side), None)
+            if wall is not None:
+                self._walls_version += 1
+                events.append(self._removed_event(wall, now))
+        return events
+
+    def _cleanup_dead_walls(self, orderbook, now: float) -> List[dict]:
         events: List[dict] = []
-        all_prices = {(l.price, WallSide.BID) for l in orderbook.bids} | {(l.price, WallSide.ASK) for l in orderbook.asks}
+        all_keys = {(t, WallSide.BID) for t in self._ticks(orderbook.bids_price)} | {
+            (t, WallSide.ASK) for t in self._ticks(orderbook.asks_price)
+        }
 
-        dead_keys: List[Tuple[float, WallSide]] = []
+        dead_keys: List[Tuple[int, WallSide]] = []
         for key, wall in self.walls.items():
-            if key not in all_prices:
-                events.append(
-                    {
-                        "type": "WALL_REMOVED",
-                        "wall": wall.to_dict(),
-                        "reason": "consumed" if wall.test_count > 0 else "cancelled",
-                    }
-                )
+            if key not in all_keys:
+                events.append(self._removed_event(wall, now))
                 dead_keys.append(key)
 
         for key in dead_keys:
             del self.walls[key]
+        if dead_keys:
+            self._walls_version += 1
 
         return events
 
-    def get_real_walls(self, timeframe: str = "1h") -> List[Wall]:
-        return [w for w in self.walls.values() if w.is_real(timeframe)]
+    def get_real_walls(self, timeframe: str = "1h", now: Optional[float] = None) -> List[Wall]:
+        now = time.time() if now is None else now
+        return [w for w in self.walls.values() if w.is_real_at(timeframe, now)]
 
     def get_wall_map(self, timeframe: str = "1h") -> dict:
-        real_walls = self.get_real_walls(timeframe)
+        now = time.time()
+        cache_key = (self._walls_version, int(now // WALL_MAP_REFRESH_SEC))
+        cached = self._map_cache.get(timeframe)
+        if cached is not None and cached[0] == cache_key:
+            return {**cached[1], "timestamp": now}
+
+        wall_map = self._build_wall_map(timeframe, now)
+        self._map_cache[timeframe] = (cache_key, wall_map)
+        return wall_map
+
+    def _build_wall_map(self, timeframe: str, now: float) -> dict:
+        real_walls = self.get_real_walls(timeframe, now)
+
+        def score(w: Wall) -> float:
+            return w.persistence_score_at(now)
 
-        bid_walls = sorted([w for w in real_walls if w.side == WallSide.BID], key=lambda w: w.persistence_score, reverse=True)
-        ask_walls = sorted([w for w in real_walls if w.side == WallSide.ASK], key=lambda w: w.persistence_score, reverse=True)
+        bid_walls = [w for w in real_walls if w.side == WallSide.BID]
+        ask_walls = [w for w in real_walls if w.side == WallSide.ASK]
 
+        # nlargest matches sorted(..., reverse=True)[:5], ties included, without sorting every wall.
         return {
             "timeframe": timeframe,
-            "timestamp": time.time(),
-            "bid_walls": [w.to_dict() for w in bid_walls[:5]],
-            "ask_walls": [w.to_dict() for w in ask_walls[:5]],
+            "timestamp": now,
+            "bid_walls": [w.to_dict(now) for w in heapq.nlargest(5, bid_walls, key=score)],
+            "ask_walls": [w.to_dict(now) for w in heapq.nlargest(5, ask_walls, key=score)],
             "total_bid_walls": len(bid_walls),
             "total_ask_walls": len(ask_walls),
         }
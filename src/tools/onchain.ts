@@ -34,7 +34,7 @@ function isValidHttpUrl(raw: string): boolean {
 }
 
 export function registerOnchainTools(server: McpServer) {
-  server.tool('bsc-analyzer-healthcheck', 'Check local Python/web3 availability and optional RPC connectivity', {
+  server.tool('bsc-analyzer-healthcheck', 'Check local Python/web3/aiohttp availability and optional RPC connectivity', {
     rpcUrl: z.string().optional().describe('Optional BSC RPC URL to test connectivity (http/https)'),
     timeoutMs: z.number().int().positive().optional().default(30000).describe('Max runtime in ms (default: 30000)')
   }, async ({ rpcUrl, timeoutMs }) => {
@@ -63,6 +63,11 @@ export function registerOnchainTools(server: McpServer) {
         ' out["requests"]="ok"',
         'except Exception as e:',
         ' out["requests"]="error"; out["requestsError"]=str(e)',
+        'try:',
+        ' import aiohttp',
+        ' out["aiohttp"]="ok"',
+        'except Exception as e:',
+        ' out["aiohttp"]="error"; out["aiohttpError"]=str(e)',
       ];
 
       if (rpcUrl) {
@@ -184,7 +189,7 @@ export function registerOnchainTools(server: McpServer) {
           type: 'text',
           text:
             `Error: ${message}\n` +
-            `Requirements: Python 3 + pip packages (web3). You can set PYTHON_BIN to choose the python executable. ` +
+            `Requirements: Python 3 + pip packages (web3, aiohttp). You can set PYTHON_BIN to choose the python executable. ` +
             `To use a dedicated RPC (e.g. GetBlock), set BSC_RPC_URL or pass rpcUrl to this tool.`
         }],
         isError: true
@@ -94,7 +94,7 @@ export function registerOrderBookTools(server: McpServer) {
 
   server.tool(
     'orderbook-start-collector',
-    'Start the bundled Python orderbook collector (writes latest.json + orderbook.db)',
+    'Start the bundled Python orderbook collector (writes per-symbol snapshots to latest/<SYMBOL>.json or .msgpack, a latest.json index + orderbook.db)',
     {
       dataDir: z.string().optional().describe('Data directory (default: ~/.mcp-server-ccxt/orderbook)'),
       symbols: z.array(z.string()).optional().default(['BTCUSDT']).describe('Symbols like BTCUSDT, ETHUSDT'),
@@ -102,7 +102,12 @@ export function registerOrderBookTools(server: McpServer) {
         .record(z.number())
         .optional()
         .describe('Optional per-symbol wall thresholds in USD, e.g. {"BTCUSDT":300000}'),
-      writeIntervalSec: z.number().positive().optional().default(2).describe('latest.json write interval (default: 2s)'),
+      writeIntervalSec: z
+        .number()
+        .positive()
+        .optional()
+        .default(2)
+        .describe('Snapshot write interval for latest/<SYMBOL>.* and the latest.json index (default: 2s)'),
       ofiIntervalSec: z.number().positive().optional().default(30).describe('OFI history persist interval (default: 30s)'),
       wallSnapshotIntervalSec: z
         .number()
@@ -228,7 +233,7 @@ export function registerOrderBookTools(server: McpServer) {
 
   server.tool(
     'orderbook-status',
-    'Get collector status based on latest.json (and whether a local collector process is running)',
+    'Get collector status based on the latest.json index (and whether a local collector process is running)',
     {
       dataDir: z.string().optional().describe('Optional data directory override'),
       timeoutMs: z.number().int().positive().optional().default(30000).describe('Max runtime in ms (default: 30000)'),